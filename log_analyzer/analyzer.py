@@ -1,175 +1,484 @@
-from collections import defaultdict
-from typing import Dict, Any
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, Any, Iterable, Union
+from datetime import datetime
+from functools import lru_cache, partial
+from itertools import chain, islice
+import heapq
+import locale
+import math
+import mmap
+import os
 import re
-import multiprocessing
+import sys
 
-def _parse_log_line(args):
-    line, regex, delimiter, start_dt, end_dt, service_names, event_type_filter = args
-    from datetime import datetime
-    def parse_time(ts):
+from .histogram import histogram_quantiles, loglinear_bin
+
+ERROR = sys.intern('ERROR')
+_MS_SUFFIXES = ('ms', 'MS', 'Ms', 'mS')
+# Raw event type -> interned upper-case form. Logs carry only a handful of
+# distinct event types, so this avoids an upper() allocation per line; the
+# size cap keeps garbage input from growing it without bound.
+_ET_CACHE = {}
+_ET_CACHE_MAX = 1024
+_PARALLEL_CHUNK_LINES = 50000
+_PARALLEL_CHUNK_CHARS = 1 << 22
+# Lines per block whose latencies are summed exactly in one math.fsum call
+_SUM_BLOCK_LINES = 1 << 16
+_READ_BUFFER_SIZE = 1 << 16
+# Parallel workers decode raw file bytes with the same encoding open() uses
+_FILE_ENCODING = locale.getpreferredencoding(False)
+_REGEX_GROUPS = ('timestamp', 'service', 'event_type', 'latency')
+_latency_array = partial(array, 'd')
+_format_rate = '{:.2f}%'.format
+_BIN_CACHE_MAX = 4096
+# Percentiles reported with latency_quantiles, as (name, quantile) pairs
+PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+def _parse_epoch_seconds(ts):
+    return datetime.fromtimestamp(float(ts))
+
+def _parse_time(ts):
+    # Try the likelier format first, judged by shape, so well-formed input parses
+    # without an exception. A '-' past the first character, ':' or 'T' means ISO,
+    # as does a compact YYYYMMDD date; a leading '-' alone is a negative epoch.
+    if not ts:
+        return None
+    if '-' in ts[1:] or ':' in ts or 'T' in ts or (len(ts) == 8 and ts.isdigit()):
+        parsers = (datetime.fromisoformat, _parse_epoch_seconds)
+    else:
+        parsers = (_parse_epoch_seconds, datetime.fromisoformat)
+    for parse in parsers:
         try:
-            return datetime.fromisoformat(ts)
-        except Exception:
-            try:
-                return datetime.fromtimestamp(float(ts))
-            except Exception:
-                return None
-    if not line or line.startswith('#'):
+            return parse(ts)
+        except (ValueError, OverflowError, OSError):
+            pass
+    return None
+
+@lru_cache(maxsize=1 << 17)
+def _parse_epoch(ts):
+    # Log timestamps repeat heavily, so the epoch value of each distinct string is memoized.
+    # Comparing plain floats is also cheaper than comparing datetime objects.
+    dt = _parse_time(ts)
+    if dt is None:
         return None
     try:
-        if regex:
-            match = regex.match(line)
-            if not match:
-                return None
-            gd = match.groupdict()
-            timestamp_str = gd.get('timestamp')
-            service_name = gd.get('service')
-            event_type = gd.get('event_type')
-            latency_str = gd.get('latency')
+        return dt.timestamp()
+    except (ValueError, OverflowError, OSError):
+        # Valid datetimes near the year 1/9999 limits can fall outside the local epoch range
+        return None
+
+def _parse_log_line(line, regex, regex_groups, delimiter, start_ts, end_ts, service_names, event_type_filter):
+    if not line or line.startswith('#'):
+        return None
+    if regex:
+        match = regex.match(line)
+        if not match:
+            return None
+        # Positional lookup of the pre-resolved named groups avoids building a groupdict per line
+        fields = match.group(*regex_groups)
+        if None in fields:
+            return None
+        if len(fields) == 4:
+            timestamp_str, service_name, event_type, latency_str = fields
         else:
-            parts = [p.strip() for p in line.split(delimiter)]
-            if len(parts) != 4:
-                return None
-            timestamp_str, service_name, event_type, latency_str = parts
-        # Time window filtering
-        if start_dt or end_dt:
-            ts_dt = parse_time(timestamp_str)
-            if ts_dt is None:
-                return None
-            if start_dt and ts_dt < start_dt:
-                return None
-            if end_dt and ts_dt > end_dt:
-                return None
-        # Service name filtering
-        if service_names and service_name not in service_names:
+            timestamp_str = None
+            service_name, event_type, latency_str = fields
+        # The group may capture surrounding whitespace, which would hide the unit suffix
+        latency_str = latency_str.strip()
+    else:
+        # Unpack the split directly and strip each field, avoiding a list-comp per line.
+        # str.split benchmarks faster here than csv.reader (which also leaves trailing
+        # whitespace to strip and cannot handle the whitespace/None delimiter).
+        parts = line.split(delimiter)
+        if len(parts) != 4:
             return None
-        # Filter by event type if specified
-        if event_type_filter and event_type.upper() != event_type_filter.upper():
+        timestamp_str, service_name, event_type, latency_str = parts
+        timestamp_str = timestamp_str.strip()
+        service_name = service_name.strip()
+        event_type = event_type.strip()
+        latency_str = latency_str.strip()
+    # Cheap service/event-type filters run before timestamp and latency parsing
+    # Service name filtering
+    if service_names and service_name not in service_names:
+        return None
+    # Filter by event type if specified (event_type_filter is already upper-cased)
+    et_up = _ET_CACHE.get(event_type)
+    if et_up is None:
+        et_up = sys.intern(event_type.upper())
+        if len(_ET_CACHE) < _ET_CACHE_MAX:
+            _ET_CACHE[event_type] = et_up
+    if event_type_filter and et_up != event_type_filter:
+        return None
+    # Time window filtering
+    if start_ts is not None or end_ts is not None:
+        ts = _parse_epoch(timestamp_str)
+        if ts is None:
             return None
-        latency = float(latency_str.lower().replace('ms', ''))
-        return {
-            'service_name': service_name,
-            'timestamp': timestamp_str,
-            'event_type': event_type,
-            'latency': latency
-        }
-    except Exception:
+        if start_ts is not None and ts < start_ts:
+            return None
+        if end_ts is not None and ts > end_ts:
+            return None
+    # The try is narrowed to the float conversion; a non-numeric value such as
+    # a 'LATENCY_MS' header simply drops the line
+    try:
+        latency = float(latency_str[:-2]) if latency_str.endswith(_MS_SUFFIXES) else float(latency_str)
+    except ValueError:
         return None
+    return service_name, timestamp_str, event_type, latency, et_up == ERROR
 
-def analyze_logs(log_data: str, event_type_filter: str = None, delimiter: str = '|', log_regex: str = None, start_time: str = None, end_time: str = None, service_names: list = None, top_slowest: int = None, latency_histogram: list = None, detect_anomalies: bool = False, parallel: bool = False) -> Dict[str, Any]:
+def _new_partial():
     """
-    Parses a string of simulated infrastructure log data and calculates
-    summary statistics: event counts and average latency per service.
-    Supports parallel processing for large log files.
+    Returns empty per-service aggregates. They are kept as parallel flat dicts
+    rather than a dict of dicts, and per-event samples are stored as three
+    parallel lists (timestamps, latencies, event types) instead of one dict
+    per event; dicts are only built for the events that end up in the report.
+    Latencies go into a packed array of C doubles (8 bytes each) rather than a
+    list of boxed Python floats. Latency sums are lists of exact partial sums
+    (see _flush_latency_sums), and the last entry holds per-service log-linear
+    latency histograms, which merge by adding bin counts.
+    """
+    return (defaultdict(int), defaultdict(list), defaultdict(int),
+            defaultdict(list), defaultdict(_latency_array), defaultdict(list),
+            defaultdict(Counter))
 
-    The expected log format is: TIMESTAMP | SERVICE_NAME | EVENT_TYPE | LATENCY_MS
-    Or a user-supplied regex with named groups: timestamp, service, event_type, latency
+def _exact_sum(values):
+    # math.fsum raises for inf - inf and on intermediate overflow; fall back to
+    # the plain sum, which yields the same nan/inf a naive total would
+    try:
+        return math.fsum(values)
+    except (ValueError, OverflowError):
+        return sum(values)
 
-    Args:
-        log_data: A string containing newline-separated log entries.
-        event_type_filter: If provided, only include events matching this type.
-        log_regex: Optional regex pattern for parsing log entries.
+def _flush_latency_sums(pending, latency_sums):
+    # Each block of latencies is reduced to its correctly rounded sum plus the
+    # residual, so the grand total from math.fsum does not depend on how the
+    # input was split into blocks, workers or files, nor on summation order
+    for service, values in pending.items():
+        total = _exact_sum(values)
+        latency_sums[service].append(total)
+        if math.isfinite(total):
+            residual = math.fsum(chain(values, (-total,)))
+            if residual:
+                latency_sums[service].append(residual)
+    pending.clear()
 
-    Returns:
-        A dictionary containing the calculated summary statistics, including
-        'total_events', 'average_latency_ms', and 'error_rate' for each service.
+def _aggregate_lines(lines, regex, regex_groups, delimiter, start_ts, end_ts, service_names, event_type_filter, collect_samples=True, collect_histograms=False):
+    """
+    Parses a block of log lines and reduces them into per-service partial
+    aggregates. Partials from separate blocks can be combined with
+    _merge_partials, which lets parallel workers return a handful of counters
+    instead of one record per line.
     """
-    lines = log_data.strip().split('\n')
-    service_stats = defaultdict(lambda: {'total_count': 0, 'total_latency': 0.0, 'error_count': 0, 'latencies': []})
+    partial_aggregates = _new_partial()
+    event_counts, latency_sums, error_counts, sample_timestamps, sample_latencies, sample_event_types, latency_hists = partial_aggregates
+    # Latency values repeat a lot at log resolution, so their bins are memoized
+    bin_cache = {}
+    pending_latencies = defaultdict(_latency_array)
 
-    from datetime import datetime
-    def parse_time(ts):
-        # Try ISO format, then epoch
-        try:
-            return datetime.fromisoformat(ts)
-        except Exception:
-            try:
-                return datetime.fromtimestamp(float(ts))
-            except Exception:
-                return None
+    for block in _iter_chunks(lines, _SUM_BLOCK_LINES):
+        for line in block:
+            entry = _parse_log_line(line, regex, regex_groups, delimiter, start_ts, end_ts, service_names, event_type_filter)
+            if not entry:
+                continue
+            service_name, timestamp_str, event_type, latency, is_error = entry
+            # Update statistics for the service
+            event_counts[service_name] += 1
+            pending_latencies[service_name].append(latency)
+            if collect_samples:
+                sample_timestamps[service_name].append(timestamp_str)
+                sample_latencies[service_name].append(latency)
+                sample_event_types[service_name].append(event_type)
+            if collect_histograms:
+                bin_name = bin_cache.get(latency)
+                if bin_name is None:
+                    bin_name = loglinear_bin(latency)
+                    if len(bin_cache) < _BIN_CACHE_MAX:
+                        bin_cache[latency] = bin_name
+                latency_hists[service_name][bin_name] += 1
+
+            if is_error:
+                error_counts[service_name] += 1
+        _flush_latency_sums(pending_latencies, latency_sums)
+
+    return partial_aggregates
+
+def _merge_partials(partials):
+    """Combines partial aggregates in order, preserving first-seen service order."""
+    merged = _new_partial()
+    event_counts, latency_sums, error_counts, sample_timestamps, sample_latencies, sample_event_types, latency_hists = merged
+    for counts, sums, errors, timestamps, latencies, event_types, hists in partials:
+        for service, count in counts.items():
+            event_counts[service] += count
+            latency_sums[service].extend(sums[service])
+            sample_timestamps[service].extend(timestamps[service])
+            sample_latencies[service].extend(latencies[service])
+            sample_event_types[service].extend(event_types[service])
+        for service, hist in hists.items():
+            latency_hists[service].update(hist)
+        for service, count in errors.items():
+            error_counts[service] += count
+    return merged
+
+def _iter_chunks(lines, size):
+    """Yields successive lists of at most `size` lines from any iterable."""
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _iter_spans(text, size):
+    """Yields (start, end) offsets of roughly `size` characters, split on newlines."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find('\n', start + size)
+        if end == -1:
+            end = length
+        yield start, end
+        start = end + 1
+
+def iter_log_lines(paths: Iterable[str]) -> Iterable[str]:
+    """Yields the lines of the given log files in order, without their line endings."""
+    for path in paths:
+        with open(path, 'r', buffering=_READ_BUFFER_SIZE) as f:
+            for line in f:
+                yield line.rstrip('\r\n')
 
-    start_dt = parse_time(start_time) if start_time else None
-    end_dt = parse_time(end_time) if end_time else None
+def _iter_file_spans(paths, size):
+    """Yields (path, start, end) byte ranges of roughly `size` bytes, split on newlines."""
+    for path in paths:
+        with open(path, 'rb') as f:
+            length = os.fstat(f.fileno()).st_size
+            if not length:
+                continue
+            # Boundaries are found by searching the mapped file, not by reading it
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = 0
+                while start < length:
+                    end = mm.find(b'\n', start + size)
+                    if end == -1:
+                        end = length
+                    yield path, start, end
+                    start = end + 1
 
+# Parser settings and (optionally) the full log text shared with pool workers.
+# They are handed over once per worker by the pool initializer, so individual
+# tasks only carry a block of lines, a pair of offsets into the text or a
+# byte range of a file.
+_worker_settings = None
+_worker_text = None
+
+def _init_worker(settings, text):
+    global _worker_settings, _worker_text
+    _worker_settings = settings
+    _worker_text = text
+
+def _aggregate_chunk(chunk):
+    if isinstance(chunk, tuple):
+        start, end = chunk
+        chunk = _worker_text[start:end].split('\n')
+    return _aggregate_lines(chunk, *_worker_settings)
+
+def _aggregate_file_span(span):
+    # Each worker maps the file itself and decodes only its own range, so
+    # neither the lines nor the file contents pass through the pool
+    path, start, end = span
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode(_FILE_ENCODING)
+    # Translate newlines the way text-mode reads do for the serial path;
+    # str.splitlines() would also break on \x0c, \x1c, \u2028 and the like
+    return _aggregate_lines(text.replace('\r\n', '\n').replace('\r', '\n').split('\n'), *_worker_settings)
+
+def _build_settings(event_type_filter, delimiter, log_regex, start_time, end_time, service_names, collect_samples, latency_quantiles):
+    """Validates the parser options and packs them into the argument tuple taken by _aggregate_lines."""
+    # Don't let cached timestamps from a previous call accumulate
+    _parse_epoch.cache_clear()
+    start_ts = _parse_epoch(start_time) if start_time else None
+    end_ts = _parse_epoch(end_time) if end_time else None
+
+    if delimiter == '' and not log_regex:
+        raise ValueError("delimiter must be a non-empty string (or None to split on whitespace)")
     regex = re.compile(log_regex) if log_regex else None
+    regex_groups = None
+    if regex:
+        # The timestamp is only needed to apply a time window
+        required = _REGEX_GROUPS if start_ts is not None or end_ts is not None else _REGEX_GROUPS[1:]
+        missing = [name for name in required if name not in regex.groupindex]
+        if missing:
+            raise ValueError(f"log_regex is missing named group(s): {', '.join(missing)}")
+        regex_groups = tuple(regex.groupindex[name] for name in _REGEX_GROUPS if name in regex.groupindex)
+    event_type_filter = event_type_filter.upper() if event_type_filter else None
+    service_names = frozenset(service_names) if service_names else None
+    return (regex, regex_groups, delimiter, start_ts, end_ts, service_names, event_type_filter, collect_samples, latency_quantiles)
 
-    parsed = []
-    if parallel:
-        with multiprocessing.Pool() as pool:
-            args = [(line, regex, delimiter, start_dt, end_dt, service_names, event_type_filter) for line in lines]
-            parsed = pool.map(_parse_log_line, args)
-        parsed = [p for p in parsed if p]
-    else:
-        for line in lines:
-            result = _parse_log_line((line, regex, delimiter, start_dt, end_dt, service_names, event_type_filter))
-            if result:
-                parsed.append(result)
-
-    for entry in parsed:
-        service_name = entry['service_name']
-        latency = entry['latency']
-        event_type = entry['event_type']
-        timestamp_str = entry['timestamp']
-        # Update statistics for the service
-        service_stats[service_name]['total_count'] += 1
-        service_stats[service_name]['total_latency'] += latency
-        service_stats[service_name]['latencies'].append({'timestamp': timestamp_str, 'latency': latency, 'event_type': event_type})
-
-        if event_type.upper() == 'ERROR':
-            service_stats[service_name]['error_count'] += 1
+def _summarize(aggregates, top_slowest, latency_histogram, detect_anomalies, latency_quantiles):
+    """Turns merged aggregates into the per-service summary returned by analyze_logs."""
+    event_counts, latency_sums, error_counts, sample_timestamps, sample_latencies, sample_event_types, latency_hists = aggregates
+    # Bucketing bisects the edges, so they must be in ascending order
+    if latency_histogram:
+        latency_histogram = sorted(latency_histogram)
 
     # Final summary calculations
     summary = {}
-    import statistics
-    for service, stats in service_stats.items():
-        total_count = stats['total_count']
+    for service, total_count in event_counts.items():
+        latencies = sample_latencies[service]
+        timestamps = sample_timestamps[service]
+        event_types = sample_event_types[service]
+
+        def event_at(i):
+            return {'timestamp': timestamps[i], 'latency': latencies[i], 'event_type': event_types[i]}
+        total_latency = _exact_sum(latency_sums[service])
         if total_count > 0:
-            avg_latency = stats['total_latency'] / total_count
-            error_rate_value = stats['error_count'] / total_count * 100
+            avg_latency = total_latency / total_count
+            error_rate_value = error_counts[service] / total_count * 100
         else:
             avg_latency = 0
             error_rate_value = 0
 
         # Top-N slowest events
         top_slowest_events = None
-        if top_slowest and stats['latencies']:
-            sorted_latencies = sorted(stats['latencies'], key=lambda x: x['latency'], reverse=True)
-            top_slowest_events = sorted_latencies[:top_slowest]
-
-        # Anomaly detection (z-score > 2)
-        anomalies = []
-        if detect_anomalies and stats['latencies'] and len(stats['latencies']) > 2:
-            latencies = [entry['latency'] for entry in stats['latencies']]
-            mean = statistics.mean(latencies)
-            stdev = statistics.stdev(latencies)
-            for entry in stats['latencies']:
-                if stdev > 0 and abs((entry['latency'] - mean) / stdev) > 2:
-                    anomalies.append(entry)
-
-        # Latency histogram
+        if top_slowest and latencies:
+            # O(N log k) selection instead of sorting every event for the service
+            top_indices = heapq.nlargest(top_slowest, range(len(latencies)), key=latencies.__getitem__)
+            top_slowest_events = [event_at(i) for i in top_indices]
+
+        # Walk the samples once for whichever of the anomaly deviation sum and the
+        # histogram counts are requested. The mean is the average already derived
+        # from the aggregated sum, so it needs no pass of its own.
+        want_deviation = detect_anomalies and len(latencies) > 2
+        bucket_counts = [0] * (len(latency_histogram) + 1) if latency_histogram and latencies else None
+        squared_deviation = 0.0
+        if want_deviation or bucket_counts is not None:
+            for latency in latencies:
+                if bucket_counts is not None:
+                    bucket_counts[bisect_left(latency_histogram, latency)] += 1
+                if want_deviation:
+                    deviation = latency - avg_latency
+                    squared_deviation += deviation * deviation
+
+        # Anomaly detection (z-score > 2), compared against a precomputed 2*stdev bound
+        # The anomalies are reported as parallel lists (one per field) rather than
+        # one dict per event
+        anomalies = None
+        if want_deviation:
+            stdev = math.sqrt(squared_deviation / (len(latencies) - 1))
+            if stdev > 0:
+                limit = 2 * stdev
+                indices = [i for i, latency in enumerate(latencies) if abs(latency - avg_latency) > limit]
+                if indices:
+                    anomalies = {
+                        'timestamp': [timestamps[i] for i in indices],
+                        'latency': [latencies[i] for i in indices],
+                        'event_type': [event_types[i] for i in indices]
+                    }
+
+        # Latency histogram, bucketed by binary search over the edges
         latency_hist = None
-        if latency_histogram and stats['latencies']:
-            buckets = latency_histogram + [float('inf')]
-            bucket_labels = [f"<= {b}" for b in latency_histogram] + ["> {latency_histogram[-1]}"]
-            counts = [0] * len(buckets)
-            for entry in stats['latencies']:
-                latency = entry['latency']
-                for i, edge in enumerate(buckets):
-                    if latency <= edge:
-                        counts[i] += 1
-                        break
-            latency_hist = dict(zip(bucket_labels, counts))
-
-        summary[service] = {
+        if bucket_counts is not None:
+            bucket_labels = [f"<= {b}" for b in latency_histogram] + [f"> {latency_histogram[-1]}"]
+            latency_hist = dict(zip(bucket_labels, bucket_counts))
+
+        service_summary = summary[service] = {
             'total_events': total_count,
             'average_latency_ms': round(avg_latency, 2),
-            'error_rate': f"{error_rate_value:.2f}%"
+            'error_rate': _format_rate(error_rate_value),
+            'error_rate_pct': round(error_rate_value, 2),
+            # Raw counters let callers combine services exactly, without
+            # re-deriving them from the rounded average and formatted rate
+            'error_count': error_counts[service],
+            'total_latency_ms': total_latency
         }
         if top_slowest_events is not None:
-            summary[service]['top_slowest_events'] = top_slowest_events
+            service_summary['top_slowest_events'] = top_slowest_events
         if latency_hist is not None:
-            summary[service]['latency_histogram'] = latency_hist
-        if anomalies:
-            summary[service]['anomalies'] = anomalies
+            service_summary['latency_histogram'] = latency_hist
+        if anomalies is not None:
+            service_summary['anomalies'] = anomalies
+        if latency_quantiles:
+            log_hist = dict(latency_hists[service])
+            service_summary['latency_log_histogram'] = log_hist
+            values = histogram_quantiles(log_hist, [q for _, q in PERCENTILES])
+            service_summary['latency_percentiles_ms'] = {
+                name: round(value, 2) for (name, _), value in zip(PERCENTILES, values)
+            }
+
+    return summary
 
-    return summary
\ No newline at end of file
+def analyze_logs(log_data: Union[str, Iterable[str]], event_type_filter: str = None, delimiter: str = '|', log_regex: str = None, start_time: str = None, end_time: str = None, service_names: list = None, top_slowest: int = None, latency_histogram: list = None, detect_anomalies: bool = False, parallel: bool = False, latency_quantiles: bool = False) -> Dict[str, Any]:
+    """
+    Parses simulated infrastructure log data and calculates
+    summary statistics: event counts and average latency per service.
+    Supports parallel processing for large log files.
+
+    The expected log format is: TIMESTAMP | SERVICE_NAME | EVENT_TYPE | LATENCY_MS
+    Or a user-supplied regex with named groups: timestamp, service, event_type, latency
+
+    Args:
+        log_data: A string containing newline-separated log entries, or an
+            iterable of lines (e.g. an open file) which is consumed incrementally.
+        event_type_filter: If provided, only include events matching this type.
+        log_regex: Optional regex pattern for parsing log entries. It must define
+            the service, event_type and latency named groups, plus timestamp
+            when start_time or end_time is given.
+        latency_quantiles: If True, build a mergeable log-linear latency histogram
+            per service ('latency_log_histogram') and report approximate
+            p50/p90/p99 latencies from it ('latency_percentiles_ms').
+
+    Returns:
+        A dictionary containing the calculated summary statistics, including
+        'total_events', 'average_latency_ms', and 'error_rate' for each service,
+        plus the numeric 'error_rate_pct' and the raw 'error_count' and
+        'total_latency_ms' counters. With detect_anomalies, 'anomalies' maps
+        'timestamp', 'latency' and 'event_type' to parallel lists.
+    """
+    # Per-event samples are only needed by the optional analytics; skip them otherwise
+    collect_samples = bool(top_slowest or latency_histogram or detect_anomalies)
+    settings = _build_settings(event_type_filter, delimiter, log_regex, start_time, end_time, service_names, collect_samples, latency_quantiles)
+    is_text = isinstance(log_data, str)
+    if is_text:
+        # Shared by both paths, so the parallel spans see exactly the serial lines
+        log_data = log_data.strip()
+
+    if parallel:
+        # Hand each worker a contiguous block and merge the per-block aggregates,
+        # rather than shipping every line and parsed record over IPC. String input
+        # is shared with the workers up front and split into offset ranges, so no
+        # log data is pickled per task.
+        import multiprocessing
+        if is_text:
+            chunks = _iter_spans(log_data, _PARALLEL_CHUNK_CHARS)
+        else:
+            chunks = _iter_chunks((line.rstrip('\r\n') for line in log_data), _PARALLEL_CHUNK_LINES)
+        with multiprocessing.Pool(initializer=_init_worker, initargs=(settings, log_data if is_text else None)) as pool:
+            aggregates = _merge_partials(pool.imap(_aggregate_chunk, chunks))
+    else:
+        if is_text:
+            lines = log_data.split('\n')
+        else:
+            lines = (line.rstrip('\r\n') for line in log_data)
+        aggregates = _aggregate_lines(lines, *settings)
+    return _summarize(aggregates, top_slowest, latency_histogram, detect_anomalies, latency_quantiles)
+
+def analyze_log_files(paths: Iterable[str], event_type_filter: str = None, delimiter: str = '|', log_regex: str = None, start_time: str = None, end_time: str = None, service_names: list = None, top_slowest: int = None, latency_histogram: list = None, detect_anomalies: bool = False, parallel: bool = False, latency_quantiles: bool = False) -> Dict[str, Any]:
+    """
+    Analyzes several log files as if they were one log, in the order given.
+    Takes the same options as analyze_logs and returns the same summary.
+
+    With parallel=True the files are memory-mapped and split into byte ranges
+    on line boundaries; each worker aggregates one range and the partial
+    aggregates are merged before the summary is computed, so the result is
+    identical to the serial one.
+    """
+    collect_samples = bool(top_slowest or latency_histogram or detect_anomalies)
+    settings = _build_settings(event_type_filter, delimiter, log_regex, start_time, end_time, service_names, collect_samples, latency_quantiles)
+    if parallel:
+        import multiprocessing
+        with multiprocessing.Pool(initializer=_init_worker, initargs=(settings, None)) as pool:
+            aggregates = _merge_partials(pool.imap(_aggregate_file_span, _iter_file_spans(paths, _PARALLEL_CHUNK_CHARS)))
+    else:
+        aggregates = _aggregate_lines(iter_log_lines(paths), *settings)
+    return _summarize(aggregates, top_slowest, latency_histogram, detect_anomalies, latency_quantiles)
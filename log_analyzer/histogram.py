@@ -0,0 +1,78 @@
+"""
+Log-linear latency histograms, in the style of Circonus' circllhist.
+
+Each positive value falls into a bin named by its two leading decimal digits
+and a power of ten, e.g. 1.25 -> '12e-1', the bin covering [1.2, 1.3). Every
+bin is at most 10% wide relative to its value, so histograms from different
+services, files or workers can be merged by adding their counts, and
+quantiles read from the merged histogram keep that error bound.
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+import math
+
+ZERO_BIN = '0'
+# +inf and nan are counted here so a stray '1e999ms' cannot abort a run
+OVERFLOW_BIN = 'inf'
+# Like circllhist, values below 10^-127 (down to subnormals) count as zero
+_MIN_VALUE = 1e-127
+
+def loglinear_bin(value: float) -> str:
+    """Returns the name of the bin that `value` falls into."""
+    if value < _MIN_VALUE:
+        return ZERO_BIN
+    if not math.isfinite(value):
+        return OVERFLOW_BIN
+    exponent = math.floor(math.log10(value)) - 1
+    # The small epsilon absorbs float error such as 0.3 / 0.01 == 29.999999999999996
+    mantissa = int(value / 10.0 ** exponent + 1e-9)
+    if mantissa >= 100:
+        mantissa //= 10
+        exponent += 1
+    elif mantissa < 10:
+        exponent -= 1
+        mantissa = int(value / 10.0 ** exponent + 1e-9)
+    return f"{mantissa}e{exponent}"
+
+def bin_bounds(name: str) -> Tuple[float, float]:
+    """Returns the [low, high) range covered by a bin."""
+    if name == ZERO_BIN:
+        return 0.0, 0.0
+    if name == OVERFLOW_BIN:
+        return math.inf, math.inf
+    # Bin names are valid float literals, which parse without multiplication error
+    mantissa, exponent = name.split('e')
+    return float(name), float(f"{int(mantissa) + 1}e{exponent}")
+
+def merge_histograms(histograms: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Merges histograms by summing the counts of matching bins."""
+    merged = Counter()
+    for histogram in histograms:
+        merged.update(histogram)
+    return dict(merged)
+
+def histogram_quantiles(histogram: Dict[str, int], quantiles: Iterable[float]) -> List[float]:
+    """
+    Returns the approximate value of each q-quantile (0 <= q <= 1) as the
+    midpoint of the bin holding the rank-ceil(q * N) value, or 0.0 for an
+    empty histogram. The bins are sorted once for all of the quantiles.
+    """
+    quantiles = list(quantiles)
+    total = sum(histogram.values())
+    if not total:
+        return [0.0] * len(quantiles)
+    bins = sorted((*bin_bounds(name), count) for name, count in histogram.items())
+    results = []
+    for q in quantiles:
+        target = max(1, math.ceil(q * total))
+        seen = 0
+        for low, high, count in bins:
+            seen += count
+            if seen >= target:
+                break
+        results.append((low + high) / 2)
+    return results
+
+def histogram_quantile(histogram: Dict[str, int], q: float) -> float:
+    """Returns the approximate q-quantile; see histogram_quantiles."""
+    return histogram_quantiles(histogram, (q,))[0]
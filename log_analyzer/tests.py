@@ -1,5 +1,12 @@
+import io
+import math
+import os
+import tempfile
 import unittest
-from .analyzer import analyze_logs
+from unittest import mock
+from . import analyzer
+from .analyzer import analyze_log_files, analyze_logs
+from .histogram import histogram_quantile, histogram_quantiles, loglinear_bin, merge_histograms
 
 class TestLogAnalyzer(unittest.TestCase):
     """
@@ -114,4 +121,165 @@ class TestLogAnalyzer(unittest.TestCase):
         regex = r"^(?P<timestamp>\S+) \| (?P<service>\S+) \| (?P<event_type>\S+) \| (?P<latency>\d+\.\d+)ms$"
         result_regex_serial = analyze_logs(logs, log_regex=regex)
         result_regex_parallel = analyze_logs(logs, log_regex=regex, parallel=True)
-        self.assertEqual(result_regex_serial, result_regex_parallel)
\ No newline at end of file
+        self.assertEqual(result_regex_serial, result_regex_parallel)
+
+        # Leading whitespace is stripped from the input on both paths, so an
+        # indented first-line comment is skipped in parallel too
+        commented = "  # c | a | b | 1\n" + logs
+        self.assertEqual(analyze_logs(commented, parallel=True), analyze_logs(commented))
+        self.assertNotIn('a', analyze_logs(commented, parallel=True))
+
+    def test_iterable_input(self):
+        """Test that an iterable of lines (e.g. an open file) gives the same result as a string."""
+        logs = """
+2025-11-21 10:00:01 | TradingEngine | INFO | 12.5ms
+2025-11-21 10:00:02 | DataFeed | ERROR | 5.0ms
+2025-11-21 10:00:03 | TradingEngine | SUCCESS | 17.5ms
+"""
+        result_string = analyze_logs(logs)
+        result_iterable = analyze_logs(io.StringIO(logs))
+        self.assertEqual(result_string, result_iterable)
+        self.assertEqual(analyze_logs(io.StringIO(logs), parallel=True), result_string)
+
+    def test_top_slowest(self):
+        """Test that the N slowest events are reported per service, slowest first."""
+        logs = """
+2025-11-21 10:00:01 | ServiceA | INFO | 10.0ms
+2025-11-21 10:00:02 | ServiceA | INFO | 30.0ms
+2025-11-21 10:00:03 | ServiceA | ERROR | 20.0ms
+2025-11-21 10:00:04 | ServiceA | INFO | 5.0ms
+"""
+        result = analyze_logs(logs, top_slowest=2)
+        slowest = result['ServiceA']['top_slowest_events']
+        self.assertEqual([e['latency'] for e in slowest], [30.0, 20.0])
+        self.assertEqual(slowest[1], {'timestamp': '2025-11-21 10:00:03', 'latency': 20.0, 'event_type': 'ERROR'})
+
+    def test_histogram_and_anomalies(self):
+        """Test latency histogram bucketing and z-score anomaly detection."""
+        logs = "\n".join(f"2025-11-21 10:00:{i:02d} | ServiceA | INFO | 10.0ms" for i in range(10))
+        logs += "\n2025-11-21 10:00:59 | ServiceA | ERROR | 500.0ms\n"
+        result = analyze_logs(logs, latency_histogram=[10, 100], detect_anomalies=True)
+        self.assertEqual(result['ServiceA']['latency_histogram'], {'<= 10': 10, '<= 100': 0, '> 100': 1})
+        unsorted = analyze_logs("2025-11-21 10:00:01 | ServiceA | INFO | 75.0ms", latency_histogram=[100.0, 50.0])
+        self.assertEqual(unsorted['ServiceA']['latency_histogram'], {'<= 50.0': 0, '<= 100.0': 1, '> 100.0': 0})
+        anomalies = result['ServiceA']['anomalies']
+        self.assertEqual(anomalies, {'timestamp': ['2025-11-21 10:00:59'], 'latency': [500.0], 'event_type': ['ERROR']})
+
+    def test_regex_missing_group(self):
+        """Test that a regex without the required named groups is rejected."""
+        regex = r"^(?P<timestamp>\S+) \| (?P<service>\S+) \| (?P<latency>\d+\.\d+)ms$"
+        with self.assertRaises(ValueError):
+            analyze_logs("2025-11-21T10:00:01Z | TradingEngine | 12.5ms", log_regex=regex)
+        # The timestamp group is only required for time-window filtering
+        regex = r"^(?P<service>\w+) (?P<event_type>\w+) (?P<latency>\S+)$"
+        self.assertEqual(analyze_logs("Sérvice INFO 12.5", log_regex=regex)['Sérvice']['total_events'], 1)
+        with self.assertRaises(ValueError):
+            analyze_logs("Sérvice INFO 12.5", log_regex=regex, start_time='2025-11-21T10:00:00')
+
+    def test_latency_formats(self):
+        """Test that signed latencies and whitespace captured by a regex group still parse."""
+        logs = """
+2025-11-21 10:00:05 | DataFeed | INFO | +4
+2025-11-21 10:00:06 | DataFeed | INFO | 4ms
+2025-11-21 10:00:07 | DataFeed | INFO | LATENCY_MS
+"""
+        self.assertEqual(analyze_logs(logs)['DataFeed']['total_events'], 2)
+        regex = r"^(?P<timestamp>\S+ \S+) \| (?P<service>\w+) \| (?P<event_type>\w+) \|(?P<latency>.*)$"
+        result = analyze_logs("2025-11-21 10:00:01 | DataFeed | INFO | 12.5ms ", log_regex=regex)
+        self.assertEqual(result['DataFeed']['average_latency_ms'], 12.5)
+
+    def test_empty_delimiter(self):
+        """Test that an empty delimiter is rejected up front rather than failing per line."""
+        with self.assertRaises(ValueError):
+            analyze_logs("2025-11-21 10:00:05 | DataFeed | ERROR | 5.0ms", delimiter='')
+
+    def test_time_window_filtering(self):
+        """Test filtering by start/end time with ISO and epoch timestamps."""
+        logs = """
+2025-11-21 10:00:01 | ServiceA | INFO | 10.0ms
+2025-11-21 10:00:05 | ServiceA | INFO | 20.0ms
+2025-11-21 10:00:09 | ServiceA | INFO | 30.0ms
+"""
+        result = analyze_logs(logs, start_time='2025-11-21T10:00:02', end_time='2025-11-21T10:00:09')
+        self.assertEqual(result['ServiceA']['total_events'], 2)
+        self.assertEqual(result['ServiceA']['average_latency_ms'], 25.00)
+
+        epoch_logs = "1700000000 | ServiceA | INFO | 10.0ms\n1700000100 | ServiceA | INFO | 20.0ms"
+        result_epoch = analyze_logs(epoch_logs, start_time='1700000050')
+        self.assertEqual(result_epoch['ServiceA']['total_events'], 1)
+
+        # A leading '-' is a negative epoch, and a compact YYYYMMDD date is ISO
+        negative = analyze_logs("-3600 | ServiceA | INFO | 1.0ms\n3600 | ServiceA | INFO | 2.0ms", end_time='0')
+        self.assertEqual(negative['ServiceA']['total_events'], 1)
+        compact = analyze_logs("20251121 | ServiceA | INFO | 1.0ms\n20251020 | ServiceA | INFO | 2.0ms", start_time='2025-11-01T00:00:00')
+        self.assertEqual(compact['ServiceA']['total_latency_ms'], 1.0)
+
+        # Timestamps at the datetime limits are skipped rather than aborting the run
+        edge_logs = "0001-01-01T00:00:00 | ServiceA | INFO | 1.0ms\n9999-12-31T23:59:59 | ServiceA | INFO | 2.0ms\n" + logs
+        result_edge = analyze_logs(edge_logs, start_time='2025-11-21T10:00:02', end_time='2025-11-21T10:00:09')
+        self.assertEqual(result_edge['ServiceA']['total_events'], 2)
+
+    def test_raw_counters(self):
+        """Test that raw error and latency totals are reported alongside the derived metrics."""
+        logs = """
+2025-11-21 10:00:05 | DataFeed | ERROR | 5.0ms
+2025-11-21 10:00:06 | DataFeed | SUCCESS | 10.5ms
+2025-11-21 10:00:07 | DataFeed | ERROR | 2.0ms
+"""
+        result = analyze_logs(logs)
+        self.assertEqual(result['DataFeed']['error_count'], 2)
+        self.assertEqual(result['DataFeed']['error_rate_pct'], 66.67)
+        self.assertEqual(result['DataFeed']['total_latency_ms'], 17.5)
+        # The raw sum is not rounded, so summing it across many services stays exact
+        result = analyze_logs("2025-11-21 10:00:05 | DataFeed | INFO | 0.004ms")
+        self.assertEqual(result['DataFeed']['total_latency_ms'], 0.004)
+        # Sums are exact, so neither float drift nor how the lines are blocked changes them
+        tenths = "\n".join("2025-11-21 10:00:05 | DataFeed | INFO | 0.1ms" for _ in range(10))
+        self.assertEqual(analyze_logs(tenths)['DataFeed']['total_latency_ms'], 1.0)
+        with mock.patch.object(analyzer, '_SUM_BLOCK_LINES', 3):
+            self.assertEqual(analyze_logs(tenths)['DataFeed']['total_latency_ms'], 1.0)
+
+    def test_latency_quantiles(self):
+        """Test log-linear bins, histogram merging and the per-service percentiles."""
+        self.assertEqual(loglinear_bin(1.25), '12e-1')
+        self.assertEqual(loglinear_bin(0.3), '30e-2')
+        self.assertEqual(loglinear_bin(150.0), '15e1')
+        merged = merge_histograms([{'12e-1': 2}, {'12e-1': 1, '15e1': 1}])
+        self.assertEqual(merged, {'12e-1': 3, '15e1': 1})
+        self.assertAlmostEqual(histogram_quantile(merged, 0.5), 1.25)
+        self.assertAlmostEqual(histogram_quantile(merged, 1.0), 155.0)
+        self.assertEqual(histogram_quantiles(merged, [0.5, 1.0]), [1.25, 155.0])
+        logs = """
+2025-11-21 10:00:05 | DataFeed | SUCCESS | 1.2ms
+2025-11-21 10:00:06 | DataFeed | SUCCESS | 1.25ms
+2025-11-21 10:00:07 | DataFeed | ERROR | 150.0ms
+"""
+        result = analyze_logs(logs, latency_quantiles=True)['DataFeed']
+        self.assertEqual(result['latency_log_histogram'], {'12e-1': 2, '15e1': 1})
+        self.assertEqual(result['latency_percentiles_ms'], {'p50': 1.25, 'p90': 155.0, 'p99': 155.0})
+        self.assertNotIn('latency_log_histogram', analyze_logs(logs)['DataFeed'])
+        # Out-of-range latencies land in the zero/overflow bins instead of raising
+        self.assertEqual([loglinear_bin(v) for v in (5e-324, -math.inf, math.inf, math.nan)], ['0', '0', 'inf', 'inf'])
+        result = analyze_logs("2025-11-21 10:00:05 | DataFeed | INFO | 1e999ms", latency_quantiles=True)['DataFeed']
+        self.assertEqual(result['latency_log_histogram'], {'inf': 1})
+
+    def test_log_files(self):
+        """Test that parallel analysis of memory-mapped files matches analyzing the concatenated logs."""
+        logs = [
+            "2025-11-21 10:00:01 | AuthService | SUCCESS | 20.0ms\n2025-11-21 10:00:02 | DataFeed | ERROR | 5.0ms\n"
+            "2025-11-21 10:00:02 | Data\x0cFeed | INFO | 1.0ms\x1c\n",
+            "2025-11-21 10:00:03 | AuthService | ERROR | 40.0ms\r\n2025-11-21 10:00:04 | AuthService | SUCCESS | 300.0ms\r\n",
+        ]
+        with tempfile.TemporaryDirectory() as log_dir:
+            paths = []
+            for i, text in enumerate(logs):
+                path = os.path.join(log_dir, f"{i}.txt")
+                with open(path, 'w') as f:
+                    f.write(text)
+                paths.append(path)
+            expected = analyze_logs(''.join(logs), top_slowest=2, latency_quantiles=True)
+            self.assertEqual(analyze_log_files(paths, top_slowest=2, latency_quantiles=True), expected)
+            self.assertEqual(analyze_log_files(paths, top_slowest=2, latency_quantiles=True, parallel=True), expected)
+            # Tiny byte ranges put several span boundaries inside each file
+            with mock.patch.object(analyzer, '_PARALLEL_CHUNK_CHARS', 10):
+                self.assertEqual(analyze_log_files(paths, top_slowest=2, latency_quantiles=True, parallel=True), expected)
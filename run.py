@@ -1,133 +1,244 @@
 import sys
+import io
 import os
-import glob
+import itertools
+import math
+import contextlib
 import json
-import unittest
 import argparse
-from log_analyzer.analyzer import analyze_logs
-from log_analyzer.tests import TestLogAnalyzer
+from log_analyzer.analyzer import PERCENTILES, analyze_log_files, analyze_logs, iter_log_lines
+from log_analyzer.histogram import histogram_quantiles, merge_histograms
 
 LOG_FILE_PATH = 'logs/mock_data.txt'
 ERROR_RATE_THRESHOLD = 20.0  # percent
 LATENCY_THRESHOLD = 100.0    # ms
+READ_BUFFER_SIZE = 1 << 16   # bytes per read() syscall when streaming log files
+WRITE_BUFFER_SIZE = 1 << 16  # bytes per write() syscall for report files
+DELIMITER_SCAN_LINES = 100   # lines inspected when auto-detecting the delimiter
+CANDIDATE_DELIMITERS = ('|', ',', '\t', ';', ':')  # in order of preference
+ALERT_ERROR_RATE_TMPL = "ALERT: {0} error rate is high: {1:.2f}% (threshold: {2}%)"
+ALERT_LATENCY_TMPL = "ALERT: {0} average latency is high: {1:.2f} ms (threshold: {2} ms)"
+ANOMALY_TMPL = "Timestamp: {0}, Latency: {1}ms, Event Type: {2}"
 
-def run_analysis(log_data_source, is_stream=False, output_path=None, event_type_filter=None, delimiter='|', start_time=None, end_time=None, service_names=None, top_slowest=None, latency_histogram=None, csv_output=None, error_threshold=None, latency_threshold=None, detect_anomalies=False, log_dir=None, log_regex=None, parallel=False):
+def _dumps_report(data):
+    # orjson is an optional, much faster serializer (2-space indent); fall back to stdlib json
     try:
-        if is_stream:
-            print("--- 1. Loading log data from stdin (stream mode) ---")
-            log_data = sys.stdin.read()
-        elif log_dir:
-            print(f"--- 1. Loading log data from directory: {log_dir} ---")
-            log_data = ''
-            for file in glob.glob(os.path.join(log_dir, '*.txt')):
-                print(f"  - Including {file}")
-                with open(file, 'r') as f:
-                    log_data += f.read() + '\n'
-        else:
-            print(f"--- 1. Loading log data from: {log_data_source} ---")
-            with open(log_data_source, 'r') as f:
-                log_data = f.read()
-
-        # Auto-detect delimiter if not specified
-        auto_delimiter = delimiter
-        if delimiter is None or delimiter == 'auto':
-            for line in log_data.splitlines():
-                line = line.strip()
-                if not line or line.startswith('#') or 'Format:' in line:
-                    continue
-                for delim in ['|', ',', '\t', ';', ':']:
-                    parts = [p.strip() for p in line.split(delim)]
-                    if len(parts) == 4:
-                        auto_delimiter = delim
-                        print(f"Auto-detected delimiter: '{delim}'")
-                        break
-                if auto_delimiter != delimiter:
-                    break
-
-        analysis_results = analyze_logs(
-            log_data,
-            event_type_filter=event_type_filter,
-            delimiter=auto_delimiter,
-            log_regex=log_regex,
-            start_time=start_time,
-            end_time=end_time,
-            service_names=service_names,
-            top_slowest=top_slowest,
-            latency_histogram=latency_histogram,
-            detect_anomalies=detect_anomalies,
-            parallel=parallel
-        )
-
-        if csv_output:
-            import csv
-            with open(csv_output, 'w', newline='') as csvfile:
-                fieldnames = ['service', 'total_events', 'average_latency_ms', 'error_rate']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                for service, stats in analysis_results.items():
-                    row = {
-                        'service': service,
-                        'total_events': stats.get('total_events', 0),
-                        'average_latency_ms': stats.get('average_latency_ms', 0),
-                        'error_rate': stats.get('error_rate', '0.00%')
-                    }
-                    writer.writerow(row)
-            print(f"\nCSV summary report saved to {csv_output}")
-
-        print("\n--- 2. Infrastructure Summary Report ---")
-        if event_type_filter:
-            print(f"(Filtered by event type: {event_type_filter})")
-
-        print(json.dumps(analysis_results, indent=4))
-        for service, stats in analysis_results.items():
-            if 'anomalies' in stats and stats['anomalies']:
-                print(f"\n--- Anomalies detected for {service} ---")
-                for anomaly in stats['anomalies']:
-                    print(f"Timestamp: {anomaly['timestamp']}, Latency: {anomaly['latency']}ms, Event Type: {anomaly['event_type']}")
-
-        if output_path:
-            with open(output_path, 'w') as out_f:
-                json.dump(analysis_results, out_f, indent=4)
-            print(f"\nSummary report saved to {output_path}")
-
-        print("\n--- 2b. Overall Summary Statistics ---")
-        total_events = 0
-        total_latency = 0.0
-        total_errors = 0
-        for stats in analysis_results.values():
-            total_events += stats['total_events']
-            total_latency += stats['average_latency_ms'] * stats['total_events']
-            total_errors += float(stats['error_rate'].replace('%','')) * stats['total_events'] / 100.0
-        if total_events > 0:
-            overall_avg_latency = total_latency / total_events
-            overall_error_rate = (total_errors / total_events) * 100
-        else:
-            overall_avg_latency = 0.0
-            overall_error_rate = 0.0
-        print(f"Total events: {total_events}")
-        print(f"Overall average latency: {overall_avg_latency:.2f} ms")
-        print(f"Overall error rate: {overall_error_rate:.2f}%")
-
-        print("\n--- 2a. Alerts ---")
-        err_thresh = error_threshold if error_threshold is not None else ERROR_RATE_THRESHOLD
-        lat_thresh = latency_threshold if latency_threshold is not None else LATENCY_THRESHOLD
-        for service, stats in analysis_results.items():
-            error_rate = float(stats['error_rate'].replace('%',''))
-            avg_latency = stats['average_latency_ms']
-            if error_rate > err_thresh:
-                print(f"ALERT: {service} error rate is high: {error_rate:.2f}% (threshold: {err_thresh}%)")
-            if avg_latency > lat_thresh:
-                print(f"ALERT: {service} average latency is high: {avg_latency:.2f} ms (threshold: {lat_thresh} ms)")
-
-        print("\n--- 3. Running Unit Tests to Verify Quality ---")
-        suite = unittest.TestLoader().loadTestsFromTestCase(TestLogAnalyzer)
-        runner = unittest.TextTestRunner(verbosity=2)
-        runner.run(suite)
-
-        print("\n--- Analysis & Validation Complete ---")
-
-    except FileNotFoundError:
-        print(f"ERROR: Log file not found at {log_data_source}. Please ensure the directory structure is correct.")
+        import orjson
+    except ImportError:
+        return json.dumps(data, indent=4)
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+
+@contextlib.contextmanager
+def _buffered_stdout():
+    # Route print() through a 64 KB buffer on stdout's file descriptor, so the
+    # many small report lines go out in a few write() calls rather than one
+    # per line on a terminal. Falls back to sys.stdout if it has no real fd.
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError):
+        yield sys.stdout
+        return
+    sys.stdout.flush()
+    raw = io.FileIO(fd, 'w', closefd=False)
+    out = io.TextIOWrapper(io.BufferedWriter(raw, WRITE_BUFFER_SIZE), encoding=sys.stdout.encoding, errors=sys.stdout.errors)
+    try:
+        with contextlib.redirect_stdout(out):
+            yield out
+    finally:
+        out.close()
+
+def _prefetch_log_files(paths):
+    # Ask the kernel to start reading every file now, so the reads of later
+    # files overlap with parsing of earlier ones instead of each open() then
+    # blocking on the disk in turn. A no-op where posix_fadvise is unavailable.
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+def _event_count(item):
+    return item[1]['total_events']
+
+def run_analysis(log_data_source, is_stream=False, output_path=None, event_type_filter=None, delimiter='|', start_time=None, end_time=None, service_names=None, top_slowest=None, latency_histogram=None, csv_output=None, error_threshold=None, latency_threshold=None, detect_anomalies=False, log_dir=None, log_regex=None, parallel=False, run_tests=False, latency_quantiles=False):
+    try:
+        with _buffered_stdout() as out:
+            with contextlib.ExitStack() as stack:
+                if is_stream:
+                    print("--- 1. Loading log data from stdin (stream mode) ---")
+                    log_lines = sys.stdin
+                elif log_dir:
+                    print(f"--- 1. Loading log data from directory: {log_dir} ---")
+                    # scandir yields names with cached file types, sparing glob's per-entry stat()
+                    log_files = [entry.path for entry in os.scandir(log_dir)
+                                 if entry.name.endswith('.txt') and not entry.name.startswith('.') and entry.is_file()]
+                    for file in log_files:
+                        print(f"  - Including {file}")
+                    _prefetch_log_files(log_files)
+                    # Chain the files' lines rather than concatenating their contents
+                    # Closed on exit even when the parallel path re-reads the files itself
+                    log_lines = stack.enter_context(contextlib.closing(iter_log_lines(log_files)))
+                else:
+                    print(f"--- 1. Loading log data from: {log_data_source} ---")
+                    # Iterate the file by line so it is never held in memory as a whole
+                    log_lines = stack.enter_context(open(log_data_source, 'r', buffering=READ_BUFFER_SIZE))
+
+                # Auto-detect delimiter if not specified
+                auto_delimiter = delimiter
+                # An empty delimiter (e.g. YAML's bare `delimiter: |`) also means auto-detect
+                if not delimiter or delimiter == 'auto':
+                    # Lines read while detecting are replayed ahead of the rest of the input
+                    # Only the first few lines are inspected, and a delimiter matches when it
+                    # splits a line into four fields, i.e. occurs exactly three times in it
+                    log_lines = iter(log_lines)
+                    peeked = []
+                    for line in itertools.islice(log_lines, DELIMITER_SCAN_LINES):
+                        peeked.append(line)
+                        line = line.strip()
+                        if not line or line.startswith('#') or 'Format:' in line:
+                            continue
+                        for delim in CANDIDATE_DELIMITERS:
+                            if line.count(delim) == 3:
+                                auto_delimiter = delim
+                                print(f"Auto-detected delimiter: '{delim}'")
+                                break
+                        if auto_delimiter != delimiter:
+                            break
+                    log_lines = itertools.chain(peeked, log_lines)
+
+                # Show the loading banner before the (possibly long) analysis starts
+                out.flush()
+                analysis_options = dict(
+                    event_type_filter=event_type_filter,
+                    delimiter=auto_delimiter,
+                    log_regex=log_regex,
+                    start_time=start_time,
+                    end_time=end_time,
+                    service_names=service_names,
+                    top_slowest=top_slowest,
+                    latency_histogram=latency_histogram,
+                    detect_anomalies=detect_anomalies,
+                    parallel=parallel,
+                    latency_quantiles=latency_quantiles
+                )
+                if parallel and not is_stream:
+                    # Workers map the files and parse their own byte ranges of them,
+                    # so no lines are read here and pickled over to the pool
+                    analysis_results = analyze_log_files(log_files if log_dir else [log_data_source], **analysis_options)
+                else:
+                    analysis_results = analyze_logs(log_lines, **analysis_options)
+
+            # Order every section by service volume, busiest first, for triage.
+            # The sort is stable, so services with equal counts keep log order.
+            service_items = sorted(analysis_results.items(), key=_event_count, reverse=True)
+            analysis_results = dict(service_items)
+
+            if csv_output:
+                import csv
+                with open(csv_output, 'w', newline='', buffering=WRITE_BUFFER_SIZE) as csvfile:
+                    fieldnames = ['service', 'total_events', 'average_latency_ms', 'error_rate']
+                    writer = csv.writer(csvfile)
+                    writer.writerow(fieldnames)
+                    writer.writerows(
+                        (service, stats['total_events'], stats['average_latency_ms'], stats['error_rate'])
+                        for service, stats in service_items
+                    )
+                print(f"\nCSV summary report saved to {csv_output}")
+
+            print("\n--- 2. Infrastructure Summary Report ---")
+            if event_type_filter:
+                print(f"(Filtered by event type: {event_type_filter})")
+
+            # One pass over the services collects the anomaly report, the overall
+            # totals and the alerts; each section is then printed in its usual place
+            err_thresh = error_threshold if error_threshold is not None else ERROR_RATE_THRESHOLD
+            lat_thresh = latency_threshold if latency_threshold is not None else LATENCY_THRESHOLD
+            anomaly_lines = []
+            alert_lines = []
+            format_error_alert = ALERT_ERROR_RATE_TMPL.format
+            format_latency_alert = ALERT_LATENCY_TMPL.format
+            format_anomaly = ANOMALY_TMPL.format
+            total_events = 0
+            total_errors = 0
+            latency_totals = []
+            log_histograms = []
+            for service, stats in service_items:
+                total_events += stats['total_events']
+                total_errors += stats['error_count']
+                latency_totals.append(stats['total_latency_ms'])
+                if latency_quantiles:
+                    log_histograms.append(stats['latency_log_histogram'])
+                if stats.get('anomalies'):
+                    anomaly_lines.append(f"\n--- Anomalies detected for {service} ---")
+                    anomalies = stats['anomalies']
+                    anomaly_lines.extend(map(format_anomaly, anomalies['timestamp'], anomalies['latency'], anomalies['event_type']))
+                error_rate = stats['error_rate_pct']
+                avg_latency = stats['average_latency_ms']
+                if error_rate > err_thresh:
+                    alert_lines.append(format_error_alert(service, error_rate, err_thresh))
+                if avg_latency > lat_thresh:
+                    alert_lines.append(format_latency_alert(service, avg_latency, lat_thresh))
+
+            # Serialize once and reuse the text for both stdout and --output
+            report = _dumps_report(analysis_results)
+            print(report)
+            if anomaly_lines:
+                print('\n'.join(anomaly_lines))
+
+            if output_path:
+                # One write of the already-serialized report; JSON files are UTF-8
+                with open(output_path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as out_f:
+                    out_f.write(report)
+                print(f"\nSummary report saved to {output_path}")
+
+            print("\n--- 2b. Overall Summary Statistics ---")
+            # fsum adds the raw per-service sums without accumulating float error
+            total_latency = math.fsum(latency_totals)
+            if total_events > 0:
+                overall_avg_latency = total_latency / total_events
+                overall_error_rate = (total_errors / total_events) * 100
+            else:
+                overall_avg_latency = 0.0
+                overall_error_rate = 0.0
+            print(f"Total events: {total_events}")
+            print(f"Overall average latency: {overall_avg_latency:.2f} ms")
+            print(f"Overall error rate: {overall_error_rate:.2f}%")
+            if latency_quantiles:
+                # Histograms merge exactly, unlike per-service percentiles
+                overall_histogram = merge_histograms(log_histograms)
+                values = histogram_quantiles(overall_histogram, [q for _, q in PERCENTILES])
+                for (name, _), value in zip(PERCENTILES, values):
+                    print(f"Overall {name} latency: {value:.2f} ms")
+
+            print("\n--- 2a. Alerts ---")
+            if alert_lines:
+                print('\n'.join(alert_lines))
+
+            if run_tests:
+                print("\n--- 3. Running Unit Tests to Verify Quality ---")
+                # The test runner reports on stderr, so get the report out first
+                out.flush()
+                import unittest
+                from log_analyzer.tests import TestLogAnalyzer
+                suite = unittest.TestLoader().loadTestsFromTestCase(TestLogAnalyzer)
+                runner = unittest.TextTestRunner(verbosity=2)
+                runner.run(suite)
+
+            print("\n--- Analysis & Validation Complete ---")
+
+    except FileNotFoundError as e:
+        # Name what is actually missing; with --log-dir that is usually the directory itself
+        missing = e.filename if e.filename is not None else log_data_source
+        kind = 'directory' if log_dir and missing == log_dir else 'file'
+        print(f"ERROR: Log {kind} not found at {missing}. Please ensure the directory structure is correct.")
     except Exception as e:
         print(f"An unexpected error occurred during execution: {e}")
 
@@ -149,8 +260,10 @@ if __name__ == '__main__':
     parser.add_argument('--latency-threshold', type=float, help='Custom latency threshold for alerts (ms)')
     parser.add_argument('--detect-anomalies', action='store_true', help='Flag latency/error rate anomalies using statistical methods')
     parser.add_argument('--log-dir', type=str, help='Directory containing log files to analyze (all *.txt files will be processed)')
-    parser.add_argument('--log-regex', type=str, help='Regex pattern for log entry parsing (named groups: timestamp, service, event_type, latency)')
+    parser.add_argument('--log-regex', type=str, help='Regex pattern for log entry parsing (named groups: service, event_type, latency, and timestamp when filtering by time)')
     parser.add_argument('--parallel', action='store_true', help='Enable parallel processing for large log files')
+    parser.add_argument('--latency-quantiles', action='store_true', help='Report approximate p50/p90/p99 latencies from mergeable log-linear histograms')
+    parser.add_argument('--run-tests', action='store_true', help='Run the unit test suite after the analysis')
     args = parser.parse_args()
 
     # Load config file if specified
@@ -187,10 +300,12 @@ if __name__ == '__main__':
     log_dir = get_opt('log_dir')
     log_regex = get_opt('log_regex')
     parallel = get_opt('parallel', False)
+    run_tests = get_opt('run_tests', False)
+    latency_quantiles = get_opt('latency_quantiles', False)
 
     if is_stream:
-        run_analysis(None, is_stream=True, output_path=output_path, event_type_filter=event_type_filter, delimiter=delimiter, log_regex=log_regex, start_time=start_time, end_time=end_time, service_names=service_names, top_slowest=top_slowest, latency_histogram=latency_histogram, csv_output=csv_output, error_threshold=error_threshold, latency_threshold=latency_threshold, detect_anomalies=detect_anomalies, parallel=parallel)
+        run_analysis(None, is_stream=True, output_path=output_path, event_type_filter=event_type_filter, delimiter=delimiter, log_regex=log_regex, start_time=start_time, end_time=end_time, service_names=service_names, top_slowest=top_slowest, latency_histogram=latency_histogram, csv_output=csv_output, error_threshold=error_threshold, latency_threshold=latency_threshold, detect_anomalies=detect_anomalies, parallel=parallel, run_tests=run_tests, latency_quantiles=latency_quantiles)
     elif log_dir:
-        run_analysis(None, is_stream=False, output_path=output_path, event_type_filter=event_type_filter, delimiter=delimiter, log_regex=log_regex, start_time=start_time, end_time=end_time, service_names=service_names, top_slowest=top_slowest, latency_histogram=latency_histogram, csv_output=csv_output, error_threshold=error_threshold, latency_threshold=latency_threshold, detect_anomalies=detect_anomalies, log_dir=log_dir, parallel=parallel)
+        run_analysis(None, is_stream=False, output_path=output_path, event_type_filter=event_type_filter, delimiter=delimiter, log_regex=log_regex, start_time=start_time, end_time=end_time, service_names=service_names, top_slowest=top_slowest, latency_histogram=latency_histogram, csv_output=csv_output, error_threshold=error_threshold, latency_threshold=latency_threshold, detect_anomalies=detect_anomalies, log_dir=log_dir, parallel=parallel, run_tests=run_tests, latency_quantiles=latency_quantiles)
     else:
-        run_analysis(file_path, output_path=output_path, event_type_filter=event_type_filter, delimiter=delimiter, log_regex=log_regex, start_time=start_time, end_time=end_time, service_names=service_names, top_slowest=top_slowest, latency_histogram=latency_histogram, csv_output=csv_output, error_threshold=error_threshold, latency_threshold=latency_threshold, detect_anomalies=detect_anomalies, parallel=parallel)
\ No newline at end of file
+        run_analysis(file_path, output_path=output_path, event_type_filter=event_type_filter, delimiter=delimiter, log_regex=log_regex, start_time=start_time, end_time=end_time, service_names=service_names, top_slowest=top_slowest, latency_histogram=latency_histogram, csv_output=csv_output, error_threshold=error_threshold, latency_threshold=latency_threshold, detect_anomalies=detect_anomalies, parallel=parallel, run_tests=run_tests, latency_quantiles=latency_quantiles)
\ No newline at end of file